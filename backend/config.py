@@ -9,6 +9,10 @@ class Settings:
     # OpenAI API settings
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
     EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "text-embedding-3-large")
+    # "openai" or "local"; local runs fastembed's ONNX models in-process
+    # (wipe CHROMA_PERSIST_DIRECTORY when switching — vector dimensions differ)
+    EMBEDDING_BACKEND: str = os.getenv("EMBEDDING_BACKEND", "openai")
+    LOCAL_EMBEDDING_MODEL: str = os.getenv("LOCAL_EMBEDDING_MODEL", "BAAI/bge-small-en-v1.5")
     LLM_MODEL: str = os.getenv("LLM_MODEL", "gpt-3.5-turbo")
     
     # Server settings
@@ -18,5 +22,10 @@ class Settings:
     
     # Vector database settings
     CHROMA_PERSIST_DIRECTORY: str = os.getenv("CHROMA_PERSIST_DIRECTORY", "./chroma_db")
+
+    # Semantic answer cache settings
+    SEMANTIC_CACHE_PATH: str = os.getenv("SEMANTIC_CACHE_PATH", "./semantic_cache.pkl")
+    SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.92))
+    SEMANTIC_CACHE_TTL: int = int(os.getenv("SEMANTIC_CACHE_TTL", 3600))
     ANONYMIZED_TELEMETRY: bool = os.getenv("ANONYMIZED_TELEMETRY", "False").lower() == "false"
 settings = Settings()
\ No newline at end of file
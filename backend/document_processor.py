@@ -4,59 +4,77 @@ import re
 import unicodedata
 from datetime import datetime
 
+# Translation table deleting UTF-16 surrogates; str.translate runs in C over
+# the unicode buffer instead of a per-character Python loop
+_SURROGATE_TABLE = {codepoint: None for codepoint in range(0xD800, 0xE000)}
+
+# Leading four-digit year in YYYY_filename.pdf; matching is cheaper than
+# raising/catching ValueError for filenames without a year prefix
+_YEAR_RE = re.compile(r'^(\d{4})')
+
 class DocumentProcessor:
     """Handles PDF document processing and text extraction"""
-    
+
     def __init__(self):
         pass
-    
+
     def clean_text(self, text: str) -> str:
         """Remove problematic Unicode characters and normalize text encoding"""
-        text = ''.join(char for char in text if not (0xD800 <= ord(char) <= 0xDFFF))
-        text = unicodedata.normalize('NFKD', text)
-        text = text.encode('utf-8', errors='ignore').decode('utf-8')
-        return text
+        return unicodedata.normalize('NFKD', text.translate(_SURROGATE_TABLE))
     
-    def extract_text_from_pdf(self, pdf_content: bytes) -> str:
-        """Extract and clean text from PDF document"""
+    def extract_text_from_pdf(self, pdf_source) -> str:
+        """Extract and clean text from a PDF given as a file path or raw bytes
+
+        Opening by path lets MuPDF mmap the file and page in only what it
+        touches, instead of copying the whole document into its heap.
+        """
         try:
-            pdf_document = fitz.open(stream=pdf_content, filetype="pdf")
-            text = ""
-            
-            for page_num in range(pdf_document.page_count):
-                page = pdf_document[page_num]
-                text += page.get_text("text") + "\n"
-            
-            pdf_document.close()
-            text = self.clean_text(text.strip())
-            
-            return text
+            if isinstance(pdf_source, (bytes, bytearray)):
+                pdf_document = fitz.open(stream=pdf_source, filetype="pdf")
+            else:
+                pdf_document = fitz.open(pdf_source)
+
+            # Skip ligature expansion and image text detection; plain text
+            # corpora only need whitespace preserved and glyphs clipped to the page
+            flags = fitz.TEXT_PRESERVE_WHITESPACE | fitz.TEXT_MEDIABOX_CLIP
+            pages = []
+
+            with pdf_document:
+                for page_num in range(pdf_document.page_count):
+                    page = pdf_document[page_num]
+                    pages.append(page.get_text("text", flags=flags))
+
+            return self.clean_text("\n".join(pages).strip())
         except Exception as e:
             raise Exception(f"Error processing PDF: {str(e)}")
     
     def extract_year_from_filename(self, filename: str) -> int:
         """Parse publication year from filename (expects YYYY_filename.pdf format)"""
-        try:
-            year_str = filename[:4]
-            year = int(year_str)
-            
+        match = _YEAR_RE.match(filename)
+        if match:
+            year = int(match.group(1))
             if 1900 <= year <= 2030:
                 return year
-            else:
-                return datetime.now().year
-                
-        except (ValueError, IndexError):
-            return datetime.now().year
+        return datetime.now().year
         
-    def process_document(self, pdf_content: bytes, filename: str) -> Dict:
-        """Extract text and metadata from PDF document"""
-        text = self.extract_text_from_pdf(pdf_content)
+    def process_document(self, pdf_source, filename: str) -> Dict:
+        """Extract text and metadata from a PDF file path or raw bytes"""
+        text = self.extract_text_from_pdf(pdf_source)
         year = self.extract_year_from_filename(filename)
-        
+
         return {
             "filename": filename,
             "text": text,
             "year": year,
             "word_count": len(text.split()),
             "processed_at": datetime.now().isoformat()
-        }
\ No newline at end of file
+        }
+
+def process_pdf_worker(file_path: str, filename: str) -> Dict:
+    """Process a single PDF by path; safe to run in a worker process
+
+    Lives here rather than in backend.main so pool workers that re-import
+    their module under spawn don't construct the app's vector store, async
+    client, or semantic cache as an import side effect.
+    """
+    return DocumentProcessor().process_document(file_path, filename)
\ No newline at end of file
@@ -0,0 +1,27 @@
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+class FastEmbedEmbeddings(Embeddings):
+    """LangChain adapter around fastembed's local ONNX embedding models
+
+    Runs embedding inference in-process via onnxruntime instead of calling
+    the OpenAI API, removing the network round trip per batch. Note that
+    local models have a different vector dimension than OpenAI's, so the
+    Chroma persist directory must be wiped when switching backends.
+    """
+
+    def __init__(self, model_name: str = "BAAI/bge-small-en-v1.5"):
+        # Imported lazily so fastembed stays an optional dependency
+        from fastembed import TextEmbedding
+
+        self.model_name = model_name
+        self._model = TextEmbedding(model_name)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of document texts locally"""
+        return [vector.tolist() for vector in self._model.embed(texts)]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a single query string locally"""
+        return self.embed_documents([text])[0]
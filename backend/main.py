@@ -1,16 +1,23 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from backend.config import settings
-from backend.document_processor import DocumentProcessor
+from backend.document_processor import process_pdf_worker
 from backend.vector_store import VectorStore
+from backend.semantic_cache import SemanticCache
 from pydantic import BaseModel
 from contextlib import asynccontextmanager
-from openai import OpenAI
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from openai import AsyncOpenAI
+import httpx
 import uvicorn
+import hashlib
+import json
 import os
+import re
 import asyncio
+import tiktoken
 
 class QuestionRequest(BaseModel):
     """Request model for question endpoint"""
@@ -25,8 +32,42 @@ class QuestionRequest(BaseModel):
             }
         }
 
-doc_processor = DocumentProcessor()
+# Phrases that signal the LLM couldn't answer from the provided context,
+# compiled into one case-insensitive scan instead of per-phrase substring checks
+_NO_INFO_PHRASES = (
+    "couldn't find",
+    "does not contain",
+    "not mentioned",
+    "no information",
+    "unable to find",
+    "context does not provide"
+)
+_NO_INFO_RE = re.compile('|'.join(re.escape(phrase) for phrase in _NO_INFO_PHRASES),
+                         re.IGNORECASE)
+
+# Hard cap on context tokens fed to the LLM; fewer input tokens means lower
+# per-call latency and cost
+_CONTEXT_TOKEN_BUDGET = 2500
+try:
+    _TOKEN_ENCODER = tiktoken.encoding_for_model(settings.LLM_MODEL)
+except KeyError:
+    _TOKEN_ENCODER = tiktoken.get_encoding("cl100k_base")
+
 vector_store = VectorStore()
+# Shared client so keep-alive connections and TLS sessions are reused across
+# requests; async so completions run on the event loop without a thread hop
+openai_client = AsyncOpenAI(
+    api_key=settings.OPENAI_API_KEY,
+    http_client=httpx.AsyncClient(
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+        timeout=30
+    )
+)
+answer_cache = SemanticCache(
+    similarity_threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+    ttl_seconds=settings.SEMANTIC_CACHE_TTL,
+    persist_path=settings.SEMANTIC_CACHE_PATH
+)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -99,7 +140,7 @@ def _process_documents_sync():
     if not os.path.exists(docs_folder):
         print("No docs folder found")
         return
-    
+
     pdf_files = [f for f in os.listdir(docs_folder) if f.endswith('.pdf')]
     if not pdf_files:
         print("No PDF files found")
@@ -107,24 +148,44 @@ def _process_documents_sync():
 
     print(f"Found {len(pdf_files)} PDF files")
     print("Processing documents...")
-    
-    documents = []
-    for filename in pdf_files:
-        try:
-            file_path = os.path.join(docs_folder, filename)
-            with open(file_path, 'rb') as file:
-                content = file.read()
-            
-            result = doc_processor.process_document(content, filename)
-            documents.append(result)
-            print(f"Processed: {result['filename']} ({result['year']})")
-            
-        except Exception as e:
-            print(f"Error processing {filename}: {e}")
-    
-    print("Creating embeddings and storing in vector database...")
-    chunk_count = vector_store.add_documents(documents)
-    print(f"Ready! Processed {len(documents)} documents into {chunk_count} searchable chunks")
+
+    # Text extraction is CPU-bound inside MuPDF, so fan out across processes;
+    # embedding stays on the main process since Chroma is not fork-safe.
+    # Each document is embedded and stored as soon as its extraction finishes,
+    # and submissions are windowed to the worker count so extracted text
+    # can't pile up in completed futures when embedding is the bottleneck.
+    processed_count = 0
+    chunk_count = 0
+    max_workers = os.cpu_count() or 1
+    remaining = iter(pdf_files)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+
+        def submit_next():
+            filename = next(remaining, None)
+            if filename is not None:
+                future = executor.submit(
+                    process_pdf_worker, os.path.join(docs_folder, filename), filename
+                )
+                futures[future] = filename
+
+        for _ in range(max_workers):
+            submit_next()
+
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                filename = futures.pop(future)
+                try:
+                    result = future.result()
+                    chunk_count += vector_store.add_documents([result])
+                    processed_count += 1
+                    print(f"Processed: {result['filename']} ({result['year']})")
+                except Exception as e:
+                    print(f"Error processing {filename}: {e}")
+                submit_next()
+
+    print(f"Ready! Processed {processed_count} documents into {chunk_count} searchable chunks")
 
 async def process_documents():
     """Async wrapper for document processing that runs in thread pool"""
@@ -135,15 +196,86 @@ async def reprocess_documents(clear_existing: bool = True):
     """Reprocess all documents and rebuild the vector database"""
     if clear_existing:
         await asyncio.to_thread(vector_store.clear_documents)
-    
+
     await process_documents()
+    # Cached answers and citations refer to the old corpus, so drop them
+    # (including the on-disk snapshot) along with it
+    await asyncio.to_thread(answer_cache.clear)
     return {"message": "Documents reprocessed successfully"}
     
     
-def _generate_answer_sync(question: str, year_filter: int = None):
+def _select_context_docs(relevant_docs: list) -> list:
+    """Drop duplicate chunks and stop once the context token budget is spent"""
+    selected = []
+    seen_hashes = set()
+    token_count = 0
+
+    for doc in relevant_docs:
+        chunk_hash = hashlib.blake2b(doc["content"].encode(), digest_size=8).digest()
+        if chunk_hash in seen_hashes:
+            continue
+
+        chunk_tokens = len(_TOKEN_ENCODER.encode(doc["content"]))
+        if selected and token_count + chunk_tokens > _CONTEXT_TOKEN_BUDGET:
+            break
+
+        seen_hashes.add(chunk_hash)
+        selected.append(doc)
+        token_count += chunk_tokens
+
+    return selected
+
+def _build_chat_messages(question: str, relevant_docs: list) -> list:
+    """Assemble the system/user messages for the chat completion"""
+    context = "\n\n".join([doc["content"] for doc in relevant_docs])
+    return [
+        {"role": "system", "content": "You are a helpful assistant that answers questions based on provided document context. Use only the information from the provided context to answer questions. If the context doesn't contain relevant information, say so."},
+        {"role": "user", "content": f"Context:\n{context}\n\nQuestion: {question}"}
+    ]
+
+def _collect_sources(answer: str, relevant_docs: list) -> list:
+    """Build the source citation list, empty if the answer is an 'I don't know'"""
+    # Only populate sources if the LLM *found* relevant information
+    if _NO_INFO_RE.search(answer) is not None:
+        return []
+
+    unique_sources = {}
+    for doc in relevant_docs:
+        filename = doc["filename"]
+        if filename not in unique_sources:
+            unique_sources[filename] = {
+                "filename": filename,
+                "year": doc["year"],
+                "preview": doc["content"][:200] + "..."
+            }
+    return list(unique_sources.values())
+
+async def _generate_answer(question: str, year_filter: int = None):
     """Search documents and generate AI answer using retrieved context"""
-    relevant_docs = vector_store.search_documents(question, year_filter=year_filter, k=5)
-    
+    cached = answer_cache.get_exact(question, year_filter=year_filter)
+    if cached is None:
+        # Embedding and Chroma are sync, so they stay on threads; only the
+        # completion itself runs natively on the event loop
+        question_embedding = await asyncio.to_thread(
+            vector_store.embeddings.embed_query, question
+        )
+        cached = answer_cache.get(question_embedding, year_filter=year_filter)
+
+    if cached is not None:
+        return {
+            "question": question,
+            "answer": cached["answer"],
+            "sources": cached["sources"],
+            "year_filter": year_filter
+        }
+
+    # The cache miss already embedded the question, so retrieval reuses that
+    # vector instead of embedding a second time inside Chroma
+    relevant_docs = _select_context_docs(await asyncio.to_thread(
+        vector_store.search_documents,
+        question, year_filter=year_filter, k=5, query_embedding=question_embedding
+    ))
+
     if not relevant_docs:
         return {
             "question": question,
@@ -151,52 +283,26 @@ def _generate_answer_sync(question: str, year_filter: int = None):
             "sources": [],
             "year_filter": year_filter
         }
-    
-    context = "\n\n".join([doc["content"] for doc in relevant_docs])
-    
-    client = OpenAI(api_key=settings.OPENAI_API_KEY)
-    response = client.chat.completions.create(
+
+    response = await openai_client.chat.completions.create(
         model=settings.LLM_MODEL,
-        messages=[
-            {"role": "system", "content": "You are a helpful assistant that answers questions based on provided document context. Use only the information from the provided context to answer questions. If the context doesn't contain relevant information, say so."},
-            {"role": "user", "content": f"Context:\n{context}\n\nQuestion: {question}"}
-        ],
+        messages=_build_chat_messages(question, relevant_docs),
         temperature=0.3,
         max_tokens=500
     )
-    
+
     answer = response.choices[0].message.content
     
-    sources = []
-    
-    no_info_phrases = [
-        "couldn't find",
-        "does not contain",
-        "not mentioned",
-        "no information",
-        "unable to find",
-        "context does not provide"
-    ]
-    
-    # Check if the LLM's answer is an "I don't know" response
-    answer_lower = answer.lower()
-    found_info = True
-    if any(phrase in answer_lower for phrase in no_info_phrases):
-        found_info = False
-
-    # Only populate sources if the LLM *found* relevant information
-    if found_info:
-        unique_sources = {}
-        for doc in relevant_docs:
-            filename = doc["filename"]
-            if filename not in unique_sources:
-                unique_sources[filename] = {
-                    "filename": filename,
-                    "year": doc["year"],
-                    "preview": doc["content"][:200] + "..."
-                }
-        sources = list(unique_sources.values())
+    sources = _collect_sources(answer, relevant_docs)
 
+    answer_cache.put(
+        question,
+        question_embedding,
+        {"answer": answer, "sources": sources},
+        year_filter=year_filter
+    )
+    # Pickling the whole cache is O(n); keep it off the event loop
+    await asyncio.to_thread(answer_cache.save)
 
     return {
         "question": question,
@@ -212,12 +318,55 @@ async def ask_question(request: QuestionRequest):
         raise HTTPException(status_code=400, detail="Question cannot be empty")
     
     try:
-        result = await asyncio.to_thread(_generate_answer_sync, request.question, request.year)
+        result = await _generate_answer(request.question, request.year)
         return result
-        
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing question: {str(e)}")
 
+@app.post("/ask/stream", tags=["Q&A"])
+async def ask_question_stream(request: QuestionRequest):
+    """Answer questions using RAG, streaming tokens as server-sent events"""
+    if not request.question.strip():
+        raise HTTPException(status_code=400, detail="Question cannot be empty")
+
+    question = request.question
+    year_filter = request.year
+
+    try:
+        relevant_docs = _select_context_docs(await asyncio.to_thread(
+            vector_store.search_documents, question, year_filter=year_filter, k=5
+        ))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing question: {str(e)}")
+
+    async def event_stream():
+        if not relevant_docs:
+            answer = "I couldn't find relevant information in the documents to answer your question."
+            yield f"data: {json.dumps({'token': answer})}\n\n"
+            yield f"data: {json.dumps({'done': True, 'sources': [], 'year_filter': year_filter})}\n\n"
+            return
+
+        stream = await openai_client.chat.completions.create(
+            model=settings.LLM_MODEL,
+            messages=_build_chat_messages(question, relevant_docs),
+            temperature=0.3,
+            max_tokens=500,
+            stream=True
+        )
+
+        parts = []
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                token = chunk.choices[0].delta.content
+                parts.append(token)
+                yield f"data: {json.dumps({'token': token})}\n\n"
+
+        sources = _collect_sources("".join(parts), relevant_docs)
+        yield f"data: {json.dumps({'done': True, 'sources': sources, 'year_filter': year_filter})}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
 @app.get("/years", tags=["Metadata"])
 async def get_available_years():
     """Get list of available document publication years"""
@@ -0,0 +1,160 @@
+import os
+import pickle
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+class SemanticCache:
+    """Caches generated answers keyed by question embedding for near-duplicate queries"""
+
+    def __init__(self, similarity_threshold: float = 0.92, ttl_seconds: int = 3600,
+                 persist_path: str = None):
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.persist_path = persist_path
+
+        # Normalized question embeddings stacked row-wise, parallel to self.entries
+        self.embedding_matrix: Optional[np.ndarray] = None
+        self.entries: List[Dict[str, Any]] = []
+        # Fast path: exact question string -> entry index, checked before the vector lookup
+        self.exact_index: Dict[str, int] = {}
+
+        if self.persist_path:
+            self._load()
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        """Convert embedding to a unit-length float32 vector"""
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        if norm > 0:
+            vec = vec / norm
+        return vec
+
+    def _entry_valid(self, entry: Dict[str, Any]) -> bool:
+        """Check whether a cache entry is still within its TTL"""
+        return (time.time() - entry["ts"]) < self.ttl_seconds
+
+    def _exact_key(self, question: str, year_filter: int = None) -> str:
+        return f"{year_filter}|{question.strip().lower()}"
+
+    def get_exact(self, question: str, year_filter: int = None) -> Optional[Dict[str, Any]]:
+        """Look up a cached result by exact question string (no embedding needed)"""
+        idx = self.exact_index.get(self._exact_key(question, year_filter))
+        if idx is None:
+            return None
+
+        entry = self.entries[idx]
+        if not self._entry_valid(entry):
+            return None
+
+        return entry["result"]
+
+    def get(self, question_embedding, year_filter: int = None) -> Optional[Dict[str, Any]]:
+        """Look up a cached result by embedding similarity"""
+        if self.embedding_matrix is None or len(self.entries) == 0:
+            return None
+
+        query = self._normalize(question_embedding)
+        similarities = np.dot(self.embedding_matrix, query)
+
+        # Restrict the argmax to live entries stored under the same filter,
+        # so a closer entry from a different year filter can't shadow a hit
+        eligible = np.fromiter(
+            (entry["year_filter"] == year_filter and self._entry_valid(entry)
+             for entry in self.entries),
+            dtype=bool,
+            count=len(self.entries)
+        )
+        if not eligible.any():
+            return None
+
+        similarities = np.where(eligible, similarities, -1.0)
+        best_idx = int(np.argmax(similarities))
+        if similarities[best_idx] < self.similarity_threshold:
+            return None
+
+        return self.entries[best_idx]["result"]
+
+    def _prune_expired(self):
+        """Drop entries past their TTL so the matrix doesn't grow without bound"""
+        keep = [i for i, entry in enumerate(self.entries) if self._entry_valid(entry)]
+        if len(keep) == len(self.entries):
+            return
+
+        if keep:
+            self.embedding_matrix = self.embedding_matrix[keep]
+            self.entries = [self.entries[i] for i in keep]
+        else:
+            self.embedding_matrix = None
+            self.entries = []
+
+        remap = {old: new for new, old in enumerate(keep)}
+        self.exact_index = {
+            key: remap[idx] for key, idx in self.exact_index.items() if idx in remap
+        }
+
+    def put(self, question: str, question_embedding, result: Dict[str, Any],
+            year_filter: int = None):
+        """Store a generated result under its question embedding
+
+        Callers that want the cache persisted should follow up with save(),
+        preferably off the event loop.
+        """
+        self._prune_expired()
+
+        vec = self._normalize(question_embedding)
+
+        if self.embedding_matrix is None:
+            self.embedding_matrix = vec.reshape(1, -1)
+        else:
+            self.embedding_matrix = np.vstack([self.embedding_matrix, vec])
+
+        self.entries.append({
+            "result": result,
+            "year_filter": year_filter,
+            "ts": time.time()
+        })
+        self.exact_index[self._exact_key(question, year_filter)] = len(self.entries) - 1
+
+    def clear(self):
+        """Drop all cached entries and remove the on-disk snapshot"""
+        self.embedding_matrix = None
+        self.entries = []
+        self.exact_index = {}
+
+        if self.persist_path and os.path.exists(self.persist_path):
+            try:
+                os.remove(self.persist_path)
+            except OSError as e:
+                print(f"Error removing semantic cache snapshot: {e}")
+
+    def _load(self):
+        """Restore cached entries from disk if a previous snapshot exists"""
+        if not os.path.exists(self.persist_path):
+            return
+
+        try:
+            with open(self.persist_path, 'rb') as f:
+                data = pickle.load(f)
+            self.embedding_matrix = data["embedding_matrix"]
+            self.entries = data["entries"]
+            self.exact_index = data["exact_index"]
+        except Exception as e:
+            print(f"Error loading semantic cache: {e}")
+
+    def save(self):
+        """Persist cached entries to disk so they survive restarts"""
+        if not self.persist_path:
+            return
+
+        try:
+            with open(self.persist_path, 'wb') as f:
+                pickle.dump({
+                    "embedding_matrix": self.embedding_matrix,
+                    "entries": self.entries,
+                    "exact_index": self.exact_index
+                }, f)
+        except Exception as e:
+            print(f"Error saving semantic cache: {e}")